@@ -25,18 +25,39 @@ conducción en el sentido de las agujas del reloj.
 
 - `/final/ccw` - El desafío de obstáculos ronda con conducción en sentido
 antihorario.
+
+Los puntos finales `/random` eligen una semilla aleatoria y redirigen a la URL
+con esa semilla, por ejemplo `/final/12345`. La misma semilla siempre produce
+el mismo campo de juego, por eso esas URL se pueden guardar y compartir.
 """
 
-from flask import Flask, make_response, render_template
+from flask import (Flask, Response, redirect, render_template, request,
+                   url_for)
 import cv2
 import numpy as np
-from random import randint, choice, sample
-from enum import Enum
+from enum import Enum, unique
+from functools import lru_cache
+import itertools
+import os
+import queue
 import random
+import secrets
+import struct
+import zlib
 
 app = Flask(__name__)
 app.debug = True
 
+# Generador de números aleatorios usado en toda la aleatorización.
+rng = random.Random()
+
+# OpenCV libera el GIL mientras dibuja, por eso las peticiones concurrentes
+# atendidas por un servidor WSGI con hilos (por ejemplo `gunicorn --threads`)
+# se ejecutan en paralelo. El paralelismo lo aportan los procesos y los hilos
+# de gunicorn (ver `gunicorn.conf.py`), que ya ocupan todos los núcleos, así
+# que OpenCV no crea hilos internos adicionales en cada proceso.
+cv2.setNumThreads(1)
+
 """
 ### Descripción general del campo de juego
 
@@ -274,6 +295,10 @@ border = 10
 # Grosor de las líneas que representan los radios y arcos
 thin_line = 2
 
+# El campo de juego es blanco; las paredes y las líneas son negras
+white_color = (255, 255, 255)
+black_color = (0, 0, 0)
+
 # La presentación de la dirección de conducción del desafío es un arco estrecho
 # en la sección central de la alfombra de juego.
 narrow_radius = 350
@@ -293,79 +318,72 @@ distance_between_parking_barriers = 300
 obstacle_size = 100
 
 
-def on_north(img, h1, w1, h2, w2, c):
-    """
-    Dibuja un cuadrado con el color dado y las coordenadas relativas
-    en la Sección N.
+# Secciones rectas. Cada sección se identifica con un número entero que
+# también es su índice en las tablas de coordenadas precalculadas.
+NORTH = 0  # Sección N
+SOUTH = 1  # Sección S
+WEST = 2   # Sección W
+EAST = 3   # Sección E
+
+# Secciones rectas en el orden en que se usan en la aleatorización.
+straight_sections = (NORTH, WEST, SOUTH, EAST)
+
+# Coeficientes para transformar las coordenadas relativas a la "Sección N"
+# en las coordenadas de cada una de las secciones rectas. Cada fila
+# contiene:
+# (signo de fila, desplazamiento de fila,
+#  signo de columna, desplazamiento de columna,
+#  intercambio de ejes)
+# Con el intercambio de ejes (1) la fila se calcula a partir de la coordenada
+# `w` y la columna a partir de la coordenada `h`.
+# El índice de la fila es el índice de la sección recta.
+section_transforms = np.array([
+    [1, 0, 1, 0, 0],            # NORTH
+    [-1, height, -1, width, 0],  # SOUTH
+    [-1, height, 1, 0, 1],      # WEST
+    [1, 0, -1, width, 1],       # EAST
+], dtype=np.int32)
+
+
+def section_rectangle(h1: int, w1: int, h2: int, w2: int,
+                      section_index: int) -> tuple:
     """
+    Transforma las coordenadas relativas de un rectángulo en las coordenadas
+    absolutas de sus esquinas superior izquierda e inferior derecha en la
+    sección recta con el índice `section_index`.
 
-    img[
-        min(h1, h2) + border:max(h1, h2)+border,
-        min(w1, w2) + border:max(w1, w2)+border
-        ] = c
-
-
-def on_south(img, h1, w1, h2, w2, c):
-    """
-    Draw a square with the given color and the given relative coordinates
-    in the Section S
+    Ambas esquinas están incluidas en el rectángulo, tal como las espera
+    `cv2.rectangle`.
     """
 
-    img[
-        height-max(h1, h2) + border:height-min(h1, h2)+border,
-        width-max(w1, w2) + border:width-min(w1, w2)+border
-        ] = c
-
-
-def on_west(img, h1, w1, h2, w2, c):
-    """
-    Dibuja un cuadrado con el color dado y las coordenadas relativas
-    en la Sección W.
-    """
-
-    img[
-        height-max(w1, w2)+border:height-min(w1, w2) + border,
-        min(h1, h2)+border:max(h1, h2) + border
-        ] = c
-
-
-def on_east(img, h1, w1, h2, w2, c):
-    """
-    Dibuja un cuadrado con el color dado y las coordenadas relativas
-    en la Sección E.
-    """
-
-    img[
-        min(w1, w2) + border:max(w1, w2) + border,
-        width-max(h1, h2)+border:width-min(h1, h2)+border
-        ] = c
-
-
-class Section(Enum):
-    """
-    Representa una sección recta.
-
-    El valor es una función para dibujar un cuadrado en la
-    sección recta correspondiente.
-    """
-    NORTH = on_north
-    SOUTH = on_south
-    WEST = on_west
-    EAST = on_east
+    row_sign, row_offset, col_sign, col_offset, swap = \
+        section_transforms[section_index].tolist()
+
+    # Coordenadas de origen de la fila y de la columna según el intercambio
+    # de ejes, sin bifurcaciones.
+    r1 = h1 + swap * (w1 - h1)
+    r2 = h2 + swap * (w2 - h2)
+    c1 = w1 + swap * (h1 - w1)
+    c2 = w2 + swap * (h2 - w2)
+
+    y1 = row_sign * r1 + row_offset
+    y2 = row_sign * r2 + row_offset
+    x1 = col_sign * c1 + col_offset
+    x2 = col_sign * c2 + col_offset
+
+    # Se resta uno a la esquina inferior derecha para cubrir los mismos
+    # píxeles que `img[y1:y2, x1:x2]`.
+    return (
+        (min(x1, x2) + border, min(y1, y2) + border),
+        (max(x1, x2) + border - 1, max(y1, y2) + border - 1)
+    )
 
 
+@unique
 class Direction(Enum):
     CW = 'cw'
     CCW = 'ccw'
 
-    @classmethod
-    def is_cw(cls, direction):
-        return direction == cls.CW
-
-    @classmethod
-    def is_ccw(cls, direction):
-        return direction == cls.CCW
-
 
 class ChallengeType(Enum):
     OPEN = 'open'
@@ -388,12 +406,39 @@ class Intersection(Enum):
     BottomRight = (inner_border, right_position)
 
 
+@unique
 class Color(Enum):
     RED = (55, 39, 238)
     GREEN = (44, 214, 68)
     UNDEFINED = (0, 0, 0)
 
 
+# Paleta de colores (BGR) de la imagen del campo de juego. Los lienzos no
+# guardan el color de cada píxel sino su índice en esta paleta: un byte por
+# píxel en lugar de tres. La imagen se codifica directamente como PNG con
+# paleta.
+palette = [
+    black_color,
+    white_color,
+    start_section_color,
+    parking_lot_color,
+    narrow_color,
+    Color.RED.value,
+    Color.GREEN.value
+]
+palette_indices = {color: index for index, color in enumerate(palette)}
+
+# Índices en la paleta de los colores usados para dibujar.
+black_index = palette_indices[black_color]
+white_index = palette_indices[white_color]
+start_section_index = palette_indices[start_section_color]
+parking_lot_index = palette_indices[parking_lot_color]
+narrow_index = palette_indices[narrow_color]
+
+# Índice en la paleta del color de cada valor de `Color`.
+color_indices = {color: palette_indices[color.value] for color in Color}
+
+
 class Obstacle:
     """
     Representa un obstáculo en la alfombra de juego.
@@ -401,6 +446,8 @@ class Obstacle:
     El obstáculo se define por la posición y el color.
     """
 
+    __slots__ = ('position', 'color')
+
     def __init__(self, position: Intersection, color: Color):
         self.position = position
         self.color = color
@@ -414,26 +461,6 @@ class Obstacle:
     def is_green(self):
         return self.color == Color.GREEN
 
-    def _x(self):
-        return self.position.value[0]
-
-    def _y(self):
-        return self.position.value[1]
-
-    def _color(self):
-        return self.color.value
-
-    def draw(self, img: np.ndarray, section: Section):
-        """
-        Dibuja un obstáculo cuadrado en la sección recta definida por la
-        función `section` dada.
-        """
-
-        section(img,
-                self._x()-(obstacle_size//2), self._y()-(obstacle_size//2),
-                self._x()+(obstacle_size//2), self._y()+(obstacle_size//2),
-                self._color())
-
 
 class StartZone(Enum):
     Z1 = (Intersection.X1, Intersection.BottomRight)
@@ -443,6 +470,10 @@ class StartZone(Enum):
     Z5 = (Intersection.TopMiddle, Intersection.T3)
     Z6 = (Intersection.TopLeft, Intersection.X2)
 
+
+# Índice de cada zona de inicio en las tablas precalculadas.
+start_zone_indices = {zone: index for index, zone in enumerate(StartZone)}
+
 # Intersecciones que estarán frente al vehículo para la dirección dada
 # y la zona de inicio dada.
 #
@@ -453,26 +484,27 @@ class StartZone(Enum):
 # Dirección en sentido antihorario:
 #   Z3: X1, X2
 #   Z4: T2, T4
-
-
+#
+# Las intersecciones se guardan en conjuntos inmutables para comprobar la
+# pertenencia de una posición sin recorrerlas.
 forbidden_intersections_in_start_zone = {
     Direction.CW: {
-        StartZone.Z3: [Intersection.T1, Intersection.T3],
-        StartZone.Z4: [Intersection.X1, Intersection.X2]
+        StartZone.Z3: frozenset({Intersection.T1, Intersection.T3}),
+        StartZone.Z4: frozenset({Intersection.X1, Intersection.X2})
     },
     Direction.CCW: {
-        StartZone.Z3: [Intersection.X1, Intersection.X2],
-        StartZone.Z4: [Intersection.T2, Intersection.T4]
+        StartZone.Z3: frozenset({Intersection.X1, Intersection.X2}),
+        StartZone.Z4: frozenset({Intersection.T2, Intersection.T4})
     }
 }
 
 # Según las reglas, estas intersecciones en la sección recta que contiene el
 # estacionamiento no pueden ser utilizadas para la colocación de obstáculos.
-forbidden_intersections_in_parking_section = [
+forbidden_intersections_in_parking_section = frozenset({
     Intersection.T3,
     Intersection.T4,
     Intersection.X2
-]
+})
 
 
 class VehiclePosition:
@@ -480,8 +512,11 @@ class VehiclePosition:
      Representa la posición de inicio de un vehículo en el campo de juego.
     """
 
+    __slots__ = ('start_zone', 'zone_index')
+
     def __init__(self, start_zone: StartZone):
         self.start_zone = start_zone
+        self.zone_index = start_zone_indices[start_zone]
 
     def _top_left_x(self):
         return self.start_zone.value[0].value[0]
@@ -495,119 +530,155 @@ class VehiclePosition:
     def _bottom_right_y(self):
         return self.start_zone.value[1].value[1]
 
-    def draw(self, img: np.ndarray, section: Section):
+    def draw(self, img: np.ndarray, section: int):
         """
-        Dibuja una zona de inicio de vehículo en la sección recta definida
-        por la función `section` dada.
+        Dibuja una zona de inicio de vehículo en la sección recta `section`
+        dada.
         """
 
-        section(img,
-                self._top_left_x(), self._top_left_y(),
-                self._bottom_right_x(), self._bottom_right_y(),
-                start_section_color)
+        x1, y1, x2, y2 = start_zones_rects[self.zone_index, section].tolist()
+        cv2.rectangle(img, (x1, y1), (x2, y2), start_section_index,
+                      -1, cv2.LINE_8)
 
 
 class InnerWall:
     """
     Representa las paredes internas del campo de juego.
+
+    Los lados en los que la pared interior está más cerca de la pared
+    exterior se guardan como un campo de bits en el que el número de bit es
+    el identificador de la sección: norte (bit 0), sur (bit 1), oeste (bit 2)
+    y este (bit 3).
     """
 
-    def __init__(self, sides: list[Section] = []):
-        self._north = Section.NORTH in sides
-        self._west = Section.WEST in sides
-        self._south = Section.SOUTH in sides
-        self._east = Section.EAST in sides
+    __slots__ = ('_flags', 'fixed_center')
+
+    def __init__(self, sides: list[int] = []):
+        self._flags = 0
+        for side in sides:
+            self._flags |= 1 << side
 
         # Inicializa las paredes en el medio como fijas
         self.fixed_center = True
 
-    def on_north(self):
+    def on_north(self) -> bool:
         """
         Comprueba si la pared interior está más cerca de la pared exterior en
         el lado norte de la alfombra de juego.
         """
-        return self._north
+        return bool(self._flags & (1 << NORTH))
 
-    def on_west(self):
+    def on_west(self) -> bool:
         """
         Comprueba si la pared interior está más cerca de la pared exterior en
         el lado oeste de la alfombra de juego.
         """
-        return self._west
+        return bool(self._flags & (1 << WEST))
 
-    def on_south(self):
+    def on_south(self) -> bool:
         """
         Comprueba si la pared interior está más cerca de la pared exterior en
         el lado sur de la alfombra de juego.
         """
-        return self._south
+        return bool(self._flags & (1 << SOUTH))
 
-    def on_east(self):
+    def on_east(self) -> bool:
         """
         Comprueba si la pared interior está más cerca de la pared exterior en
         el lado este de la alfombra de juego.
         """
-        return self._east
+        return bool(self._flags & (1 << EAST))
 
-    def on_side(self, side: Section):
+    def on_side(self, side: int) -> bool:
         """
         Comprueba si la pared interior está más cerca de la pared exterior en
         el lado dado de la alfombra de juego.
         """
-        if side == Section.NORTH:
-            return self.on_north()
-        elif side == Section.WEST:
-            return self.on_west()
-        elif side == Section.SOUTH:
-            return self.on_south()
-        elif side == Section.EAST:
-            return self.on_east()
+        return bool(self._flags & (1 << side))
+
+    def config_index(self) -> int:
+        """
+        Devuelve el índice (0-15) de la configuración de las paredes
+        interiores: un bit por cada lado en el que la pared interior está más
+        cerca de la pared exterior (norte, sur, oeste, este).
+        """
+        return self._flags
 
     def draw(self, img: np.ndarray):
         """
         Dibuja las paredes interiores de la alfombra de juego.
         """
 
-        # posición predeterminada de las paredes interiores
-        h_n = inner_border           # coordenada Y de la pared interior norte
-        w_w = inner_border           # coordenada X de la pared interior oeste
-        h_s = height - inner_border  # coordenada Y de la pared interior sur
-        w_e = width - inner_border   # coordenada X de la pared interior este
-
-        # Ajusta la posición de las paredes interiores en función de qué lado
-        # de la alfombra la pared interior debe ser dibujada más cerca de las
-        # paredes exteriores - la pared se posiciona a lo largo del segundo
-        # arco de la sección recta correspondiente.
-
-        if self.on_north():
-            h_n = second_line
-        if self.on_west():
-            w_w = second_line
-        if self.on_south():
-            h_s = height - second_line
-        if self.on_east():
-            w_e = width - second_line
+        draw_inner_walls(img, self.config_index())
+
+
+def draw_inner_walls(img: np.ndarray, config: int):
+    """
+    Dibuja las paredes interiores con la configuración `config`
+    (ver `InnerWall.config_index()`).
+    """
+
+    # Las paredes son negras: se dibujan con el índice del negro en la paleta.
+    for top_left, bottom_right in inner_walls_configurations[config]:
+        cv2.rectangle(img, top_left, bottom_right, black_index, -1,
+                      cv2.LINE_8)
+
+
+def inner_walls_areas(north: bool, west: bool, south: bool, east: bool):
+    """
+    Calcula las áreas de la imagen ocupadas por las paredes interiores para
+    la configuración dada. Devuelve una lista con las esquinas superior
+    izquierda e inferior derecha (incluidas) de cada pared: norte, oeste, sur
+    y este.
+    """
 
+    # posición predeterminada de las paredes interiores
+    h_n = inner_border           # coordenada Y de la pared interior norte
+    w_w = inner_border           # coordenada X de la pared interior oeste
+    h_s = height - inner_border  # coordenada Y de la pared interior sur
+    w_e = width - inner_border   # coordenada X de la pared interior este
+
+    # Ajusta la posición de las paredes interiores en función de qué lado
+    # de la alfombra la pared interior debe ser dibujada más cerca de las
+    # paredes exteriores - la pared se posiciona a lo largo del segundo
+    # arco de la sección recta correspondiente.
+
+    if north:
+        h_n = second_line
+    if west:
+        w_w = second_line
+    if south:
+        h_s = height - second_line
+    if east:
+        w_e = width - second_line
+
+    # Extremos de cada pared: las paredes tienen el grosor `border` y están
+    # centradas sobre su coordenada.
+    top = h_n - (border//2) + border
+    bottom = h_s + (border//2) + border - 1
+    left = w_w - (border//2) + border
+    right = w_e + (border//2) + border - 1
+
+    return [
         # norte
-        img[
-            h_n - (border//2) + border:h_n + (border//2) + border,
-            w_w - (border//2) + border:w_e + (border//2) + border
-            ] = (0, 0, 0)
+        ((left, top), (right, top + border - 1)),
         # oeste
-        img[
-            h_n - (border//2) + border:h_s + (border//2) + border,
-            w_w - (border//2) + border:w_w + (border//2) + border
-            ] = (0, 0, 0)
+        ((left, top), (left + border - 1, bottom)),
         # sur
-        img[
-            h_s - (border//2) + border:h_s + (border//2) + border,
-            w_w - (border//2) + border:w_e + (border//2) + border
-            ] = (0, 0, 0)
+        ((left, bottom - border + 1), (right, bottom)),
         # este
-        img[
-            h_n - (border//2) + border:h_s + (border//2) + border,
-            w_e - (border//2) + border:w_e + (border//2) + border
-            ] = (0, 0, 0)
+        ((right - border + 1, top), (right, bottom))
+    ]
+
+
+# Solo existen 2^4 = 16 configuraciones de las paredes interiores, por eso
+# sus áreas se calculan una sola vez al cargar el módulo. El índice de la
+# lista coincide con `InnerWall.config_index()`.
+inner_walls_configurations = [
+    inner_walls_areas(bool(config & (1 << NORTH)), bool(config & (1 << WEST)),
+                      bool(config & (1 << SOUTH)), bool(config & (1 << EAST)))
+    for config in range(16)
+]
 
 # El proceso de aleatorización opera con conjuntos de obstáculos.
 # Cada elemento de la lista define posiciones relativas de los obstáculos en la
@@ -690,6 +761,69 @@ obstacles_sets = [
      Obstacle(Intersection.T4, Color.RED)],                  # 31, Card 36
 ]
 
+# Las posiciones de los obstáculos de cada conjunto se guardan también en
+# tablas de NumPy y sus colores como listas de índices de la paleta, para
+# dibujarlos sin recorrer los objetos `Obstacle` ni los valores de las
+# enumeraciones en cada petición.
+# Cada conjunto tiene como máximo dos obstáculos; las posiciones sin obstáculo
+# se rellenan con -1 y se ignoran gracias a `obstacles_counts`.
+max_obstacles_in_set = max(len(one_set) for one_set in obstacles_sets)
+
+obstacles_counts = np.array(
+    [len(one_set) for one_set in obstacles_sets], dtype=np.int8
+    )
+
+obstacles_positions = np.full(
+    (len(obstacles_sets), max_obstacles_in_set, 2), -1, dtype=np.int16
+    )
+
+obstacles_colors = [
+    [color_indices[one_obstacle.color] for one_obstacle in one_set]
+    for one_set in obstacles_sets
+]
+
+for set_index, one_set in enumerate(obstacles_sets):
+    for slot, one_obstacle in enumerate(one_set):
+        obstacles_positions[set_index, slot] = one_obstacle.position.value
+
+# Coordenadas absolutas de los obstáculos de cada conjunto en cada una de las
+# secciones rectas: (x1, y1, x2, y2) de las esquinas superior izquierda e
+# inferior derecha, calculadas una sola vez al cargar el módulo.
+obstacles_rects = np.full(
+    (len(obstacles_sets), len(section_transforms), max_obstacles_in_set, 4),
+    -1, dtype=np.int16
+    )
+
+for set_index in range(len(obstacles_sets)):
+    for section_index in range(len(section_transforms)):
+        for slot in range(obstacles_counts[set_index]):
+            x, y = obstacles_positions[set_index, slot].tolist()
+            top_left, bottom_right = section_rectangle(
+                x - (obstacle_size // 2), y - (obstacle_size // 2),
+                x + (obstacle_size // 2), y + (obstacle_size // 2),
+                section_index
+                )
+            obstacles_rects[set_index, section_index, slot] = \
+                top_left + bottom_right
+
+# Coordenadas absolutas de cada zona de inicio en cada una de las secciones
+# rectas: (x1, y1, x2, y2) de las esquinas superior izquierda e inferior
+# derecha.
+start_zones_rects = np.zeros(
+    (len(start_zone_indices), len(section_transforms), 4), dtype=np.int16
+    )
+
+for zone, zone_index in start_zone_indices.items():
+    vehicle_position = VehiclePosition(zone)
+    for section_index in range(len(section_transforms)):
+        top_left, bottom_right = section_rectangle(
+            vehicle_position._top_left_x(), vehicle_position._top_left_y(),
+            vehicle_position._bottom_right_x(),
+            vehicle_position._bottom_right_y(),
+            section_index
+            )
+        start_zones_rects[zone_index, section_index] = top_left + bottom_right
+
 # El proceso de aleatorización dice que al menos uno de los
 # secciones rectas debe tener al menos un obstáculo
 # en la intersección etiquetada como "X2". El mapa contiene índices
@@ -727,9 +861,11 @@ vehicle_positions_in_obstacle = [
     VehiclePosition(StartZone.Z3)
 ]
 
-# Plantilla de imagen del campo de juego
-template = np.zeros((height+border * 2,
-                     width+border * 2, 3), np.uint8)
+# Plantilla de imagen del campo de juego.
+# Como los lienzos, la plantilla guarda el índice en la paleta del color de
+# cada píxel (un canal), así ocupa 9 MB en lugar de 27 MB.
+template = np.full((height+border * 2,
+                    width+border * 2), black_index, np.uint8)
 
 # El campo de juego es un cuadrado blanco con el borde que
 # representa las paredes exteriores.
@@ -738,227 +874,338 @@ template = np.zeros((height+border * 2,
 template[
     border:height + border,
     border:width+border
-    ] = (255, 255, 255)
+    ] = white_index
+
+# Líneas del campo de juego que representan los arcos y los radios de las
+# secciones rectas. Cada elemento contiene los límites de las filas y de las
+# columnas que ocupa la línea (el límite final no está incluido):
+# (fila inicial, fila final, columna inicial, columna final)
+template_lines = [
+    # Las líneas que representan arcos en la "Sección N"
+    (first_line - (thin_line//2) + border,
+     first_line + (thin_line//2) + border,
+     border + inner_border,
+     width - inner_border + border),
+    (second_line - (thin_line//2) + border,
+     second_line + (thin_line//2) + border,
+     border + inner_border,
+     width - inner_border + border),
+    # Una línea que representa el radio izquierdo de la "Sección W", el borde
+    # de la "Sección N" con la sección central y el radio derecho de la
+    # "Sección E".
+    (inner_border - (thin_line//2) + border,
+     inner_border + (thin_line//2) + border,
+     border,
+     width + border),
+    # Las líneas que representan arcos en la "Sección S"
+    (height - first_line - (thin_line//2) + border,
+     height - first_line + (thin_line//2) + border,
+     border + inner_border,
+     width - inner_border + border),
+    (height - second_line - (thin_line//2) + border,
+     height - second_line + (thin_line//2) + border,
+     border + inner_border,
+     width - inner_border + border),
+    # Una línea que representa el radio derecho de la "Sección W", el borde
+    # de la "Sección S" con la sección central y el radio izquierdo de la
+    # "Sección E".
+    (height - inner_border - (thin_line//2) + border,
+     height - inner_border + (thin_line//2) + border,
+     border,
+     width + border),
+    # Las líneas que representan arcos en la "Sección W"
+    (border+inner_border,
+     height-inner_border+border,
+     first_line-(thin_line//2)+border,
+     first_line+(thin_line//2)+border),
+    (border + inner_border,
+     height - inner_border + border,
+     second_line - (thin_line//2) + border,
+     second_line + (thin_line//2) + border),
+    # Una línea que representa el radio izquierdo de la "Sección N", el borde
+    # de la "Sección E" con la sección central y el radio derecho de la
+    # "Sección S".
+    (border,
+     height + border,
+     inner_border - (thin_line//2) + border,
+     inner_border + (thin_line//2) + border),
+    # Las líneas que representan arcos en la "Sección E"
+    (border + inner_border,
+     height - inner_border+border,
+     width - first_line - (thin_line//2) + border,
+     width - first_line + (thin_line//2) + border),
+    (border + inner_border,
+     height - inner_border+border,
+     width - second_line - (thin_line//2) + border,
+     width - second_line + (thin_line//2) + border),
+    # Una línea que representa el radio derecho de la "Sección N", el borde
+    # de la "Sección W" con la sección central y el radio izquierdo de la
+    # "Sección S".
+    (border,
+     height + border,
+     width - inner_border - (thin_line//2) + border,
+     width - inner_border + (thin_line//2) + border),
+    # La línea que representa el radio central de la "Sección N"
+    (border,
+     inner_border + border,
+     (width//2) - (thin_line//2) + border,
+     (width//2) + (thin_line//2) + border),
+    # La línea que representa el radio central de la "Sección S"
+    (height - inner_border + border,
+     height + border,
+     (width//2) - (thin_line//2) + border,
+     (width//2) + (thin_line//2) + border),
+    # La línea que representa el radio central de la "Sección W"
+    ((height//2) - (thin_line//2) + border,
+     (height//2) + (thin_line//2) + border,
+     border,
+     inner_border + border),
+    # La línea que representa el radio central de la "Sección E"
+    ((height//2) - (thin_line//2) + border,
+     (height//2) + (thin_line//2) + border,
+     width - inner_border + border,
+     width + border),
+]
 
-# Las líneas que representan arcos en la "Sección N"
-template[
-    first_line - (thin_line//2) + border:
-    first_line + (thin_line//2) + border,
-    border + inner_border:width - inner_border + border
-    ] = (0, 0, 0)
+for row_from, row_to, col_from, col_to in template_lines:
+    cv2.rectangle(template,
+                  (col_from, row_from), (col_to - 1, row_to - 1),
+                  black_index, -1, cv2.LINE_8)
+
+# La plantilla se comparte entre todas las peticiones y nunca se dibuja sobre
+# ella directamente: se marca como de solo lectura para que cualquier
+# escritura accidental falle en lugar de corromper las imágenes siguientes.
+template.setflags(write=False)
+
+# Plantilla para las rondas de desafío de obstáculos. En estas rondas las
+# paredes interiores siempre están en el centro y ningún otro elemento se
+# dibuja sobre ellas, por eso se incluyen en la plantilla una sola vez.
+obstacle_template = template.copy()
+InnerWall().draw(obstacle_template)
+obstacle_template.setflags(write=False)
+
+# Reserva de lienzos reutilizables para dibujar el campo de juego.
+# Cada petición toma un lienzo de la reserva, copia la plantilla sobre él y lo
+# devuelve una vez codificada la imagen. Así se evita reservar y liberar
+# ~9 MB de memoria en cada petición. Los lienzos se crean bajo demanda y la
+# reserva guarda como máximo uno por cada petición concurrente esperada, es
+# decir, por cada hilo del proceso. `gunicorn.conf.py` publica su número de
+# hilos en la variable de entorno `GUNICORN_THREADS`; fuera de gunicorn basta
+# con un lienzo.
+# La reserva se comparte entre los hilos en lugar de guardar un lienzo por
+# hilo: un lienzo solo vuelve a la reserva cuando su imagen ya está
+# codificada, así que nunca se reutiliza mientras otra petición lo usa, y los
+# hilos que no están dibujando no retienen memoria.
+# Cada lienzo tiene una columna adicional a la izquierda con el tipo de filtro
+# de PNG de cada fila (0: sin filtro), así `encode_png` comprime el lienzo
+# directamente sin copiar la imagen en otro arreglo. Se dibuja sobre la vista
+# sin esa columna.
+canvas_pool_size = int(os.environ.get('GUNICORN_THREADS', '1'))
+canvas_pool: queue.LifoQueue[np.ndarray] = \
+    queue.LifoQueue(maxsize=canvas_pool_size)
+
+
+def acquire_canvas(base: np.ndarray = template) -> np.ndarray:
+    """
+    Toma un lienzo de la reserva (o crea uno nuevo si está vacía), copia
+    la plantilla `base` del campo de juego sobre él y devuelve la vista del
+    lienzo sin la columna de filtros de PNG.
+    """
+    try:
+        rows = canvas_pool.get_nowait()
+    except queue.Empty:
+        base_height, base_width = base.shape
+        rows = np.zeros((base_height, base_width + 1), np.uint8)
 
-template[
-    second_line - (thin_line//2) + border:
-    second_line + (thin_line//2) + border,
-    border + inner_border: width - inner_border + border
-    ] = (0, 0, 0)
+    canvas = rows[:, 1:]
+    np.copyto(canvas, base)
+    return canvas
 
-# Una línea que representa el radio izquierdo de la "Sección W", el borde de la
-# "Sección N" con la sección central y el radio derecho de la "Sección E".
-template[
-    inner_border - (thin_line//2) + border:
-    inner_border + (thin_line//2) + border,
-    border:width + border
-    ] = (0, 0, 0)
 
-# Las líneas que representan arcos en la "Sección S"
-template[
-    height - first_line - (thin_line//2) + border:
-    height - first_line + (thin_line//2) + border,
-    border + inner_border: width - inner_border + border
-    ] = (0, 0, 0)
+def canvas_rows(canvas: np.ndarray) -> np.ndarray:
+    """
+    Devuelve el lienzo completo, con la columna de filtros de PNG, a partir
+    de la vista devuelta por `acquire_canvas()`.
+    """
+    rows = canvas.base
+    if rows is None:
+        raise ValueError("Image does not come from acquire_canvas()")
+    return rows
 
-template[
-    height - second_line - (thin_line//2) + border:
-    height - second_line + (thin_line//2) + border,
-    border + inner_border: width - inner_border + border
-    ] = (0, 0, 0)
 
-# Una línea que representa el radio derecho de la "Sección W", el borde de la
-# "Sección S" con la sección central y el radio izquierdo de la "Sección E".
-template[
-    height - inner_border - (thin_line//2) + border:
-    height - inner_border + (thin_line//2) + border,
-    border: width + border
-    ] = (0, 0, 0)
+def release_canvas(canvas: np.ndarray):
+    """
+    Devuelve el lienzo a la reserva para reutilizarlo en otra petición.
+    Si la reserva está llena, el lienzo simplemente se descarta.
+    """
+    try:
+        canvas_pool.put_nowait(canvas_rows(canvas))
+    except queue.Full:
+        pass
 
-# Las líneas que representan arcos en la "Sección W"
-template[
-    border+inner_border:
-    height-inner_border+border,
-    first_line-(thin_line//2)+border:
-    first_line+(thin_line//2)+border
-    ] = (0, 0, 0)
-template[
-    border + inner_border:
-    height - inner_border + border,
-    second_line - (thin_line//2) + border:
-    second_line + (thin_line//2) + border
-    ] = (0, 0, 0)
-
-# Una línea que representa el radio izquierdo de la "Sección N", el borde de la
-# "Sección E" con la sección central y el radio derecho de la "Sección S".
-template[
-    border:height + border,
-    inner_border - (thin_line//2) + border:
-    inner_border + (thin_line//2) + border
-    ] = (0, 0, 0)
 
-# Las líneas que representan arcos en la "Sección E"
-template[
-    border + inner_border:
-    height - inner_border+border,
-    width - first_line - (thin_line//2) + border:
-    width - first_line + (thin_line//2) + border
-    ] = (0, 0, 0)
+# coordenadas de la esquina superior izquierda de la primera barrera
+# relativamente a la sección:
 
-template[
-    border + inner_border:
-    height - inner_border+border,
-    width - second_line - (thin_line//2) + border:
-    width - second_line + (thin_line//2) + border
-    ] = (0, 0, 0)
-
-# Una línea que representa el radio derecho de la "Sección N", el borde de la
-# "Sección W" con la sección central y el radio izquierdo de la "Sección S".
-template[
-    border: height + border,
-    width - inner_border - (thin_line//2) + border:
-    width - inner_border + (thin_line//2) + border
-    ] = (0, 0, 0)
+first_barrier_top_left = (
+    left_position,  # coordenada x
+    0               # coordenada y - alineada con el borde superior
+    )
 
-# La línea que representa el radio central de la "Sección N"
-template[
-    border: inner_border + border,
-    (width//2) - (thin_line//2) + border:
-    (width//2) + (thin_line//2) + border
-    ] = (0, 0, 0)
+# coordenadas de la esquina inferior derecha de la primera barrera
+# relativamente a la sección:
 
-# La línea que representa el radio central de la "Sección S"
-template[
-    height - inner_border + border:
-    height + border,
-    (width//2) - (thin_line//2) + border:
-    (width//2) + (thin_line//2) + border
-    ] = (0, 0, 0)
+first_barrier_bottom_right = (
+    left_position + parking_barrier_thickness,  # coordenada x
+    parking_barrier_length  # coordenada y - se extiende hacia abajo por
+                            # la longitud de la barrera
+    )
 
-# La línea que representa el radio central de la "Sección W"
-template[
-    (height//2) - (thin_line//2) + border:
-    (height//2) + (thin_line//2) + border,
-    border: inner_border + border
-    ] = (0, 0, 0)
+# coordenadas de la esquina superior izquierda de la segunda barrera
+# relativamente a la sección:
 
-# La línea que representa el radio central de la "Sección E"
-template[
-    (height//2) - (thin_line//2) + border:
-    (height//2) + (thin_line//2) + border,
-    width - inner_border + border: width + border
-    ] = (0, 0, 0)
+second_barrier_top_left = (
+    left_position + parking_barrier_thickness +
+    distance_between_parking_barriers,  # coordenada x
+    0           # coordenada y - alineada con el borde superior
+    )
+
+# coordenadas de la esquina inferior derecha de la segunda barrera
+# relativamente a la sección:
+
+second_barrier_bottom_right = (
+    left_position +
+    parking_barrier_thickness +
+    distance_between_parking_barriers +
+    parking_barrier_thickness,  # coordenada x
+    parking_barrier_length  # coordenada y - se extiende hacia abajo por
+                            # la longitud de la barrera
+    )
+
+# Coordenadas absolutas de las dos barreras del estacionamiento en cada una
+# de las secciones rectas, calculadas una sola vez al cargar el módulo. Cada
+# barrera se define por sus esquinas superior izquierda e inferior derecha.
+parking_lot_barriers_rects = [
+    [
+        section_rectangle(top_left[1], top_left[0],
+                          bottom_right[1], bottom_right[0],
+                          section_index)
+        for top_left, bottom_right in (
+            (first_barrier_top_left, first_barrier_bottom_right),
+            (second_barrier_top_left, second_barrier_bottom_right)
+            )
+    ]
+    for section_index in range(len(section_transforms))
+]
 
 
-def draw_parking_lot_barriers(img, section: Section):
+def draw_parking_lot_barriers(img: np.ndarray, section: int):
     """
     Dibuja las barreras del estacionamiento en la sección dada.
     """
-    # coordenadas de la esquina superior izquierda de la primera barrera
-    # relativamente a la sección:
 
-    first_barrier_top_left = (
-        left_position,  # coordenada x
-        0               # coordenada y - alineada con el borde superior
-        )
-
-    # coordenadas de la esquina inferior derecha de la primera barrera
-    # relativamente a la sección:
+    for top_left, bottom_right in parking_lot_barriers_rects[section]:
+        cv2.rectangle(img, top_left, bottom_right, parking_lot_index,
+                      -1, cv2.LINE_8)
 
-    first_barrier_bottom_right = (
-        left_position + parking_barrier_thickness,  # coordenada x
-        parking_barrier_length  # coordenada y - se extiende hacia abajo por
-                                # la longitud de la barrera
-        )
 
-    # coordenadas de la esquina superior izquierda de la segunda barrera
-    # relativamente a la sección:
-
-    second_barrier_top_left = (
-        left_position + parking_barrier_thickness +
-        distance_between_parking_barriers,  # coordenada x
-        0           # coordenada y - alineada con el borde superior
-        )
+def draw_obstacles_set(img: np.ndarray, section: int,
+                       obstacles_set_index: int):
+    """
+    Dibuja el conjunto de obstáculos con el índice `obstacles_set_index`
+    en la sección recta `section`.
+    """
 
-    # coordenadas de la esquina inferior derecha de la segunda barrera
-    # relativamente a la sección:
+    count = obstacles_counts[obstacles_set_index]
+    rects = obstacles_rects[obstacles_set_index, section, :count].tolist()
+
+    for (x1, y1, x2, y2), color in zip(rects,
+                                       obstacles_colors[obstacles_set_index]):
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, -1, cv2.LINE_8)
+
+
+# El centro del campo de juego se calcula teniendo en cuenta las paredes
+# exteriores.
+narrow_center = (width // 2 + border, height // 2 + border)
+narrow_axes = (narrow_radius, narrow_radius)
+narrow_start_angle = 180
+narrow_end_angle = -90
+
+# Segmentos de la flecha al final del arco para cada dirección de conducción:
+# ambos parten del extremo del arco correspondiente a la dirección.
+narrow_arrow_segments = {
+    Direction.CW: (
+        ((narrow_center[0] - narrow_radius, narrow_center[1]),
+         (narrow_center[0] - narrow_radius - 30, narrow_center[1] + 80)),
+        ((narrow_center[0] - narrow_radius, narrow_center[1]),
+         (narrow_center[0] - narrow_radius + 50, narrow_center[1] + 75))
+    ),
+    Direction.CCW: (
+        ((narrow_center[0], narrow_center[1] - narrow_radius),
+         (narrow_center[0] + 80, narrow_center[1] - narrow_radius - 30)),
+        ((narrow_center[0], narrow_center[1] - narrow_radius),
+         (narrow_center[0] + 75, narrow_center[1] - narrow_radius + 50))
+    )
+}
 
-    second_barrier_bottom_right = (
-        left_position +
-        parking_barrier_thickness +
-        distance_between_parking_barriers +
-        parking_barrier_thickness,  # coordenada x
-        parking_barrier_length  # coordenada y - se extiende hacia abajo por
-                                # la longitud de la barrera
-        )
 
-    # Dibuja ambas barreras
+def draw_narrow(img: np.ndarray, direction: Direction):
+    """
+    Dibuja el arco estrecho en la sección central del campo de juego.
+    `direction` contiene la dirección de conducción del vehículo.
+    """
 
-    section(img,
-            first_barrier_top_left[1],
-            first_barrier_top_left[0],
-            first_barrier_bottom_right[1],
-            first_barrier_bottom_right[0],
-            parking_lot_color
-            )
+    # Dibuja el arco
+    cv2.ellipse(img, narrow_center, narrow_axes, 0,
+                narrow_start_angle, narrow_end_angle,
+                (narrow_index,), narrow_thickness)
 
-    section(img,
-            second_barrier_top_left[1],
-            second_barrier_top_left[0],
-            second_barrier_bottom_right[1],
-            second_barrier_bottom_right[0],
-            parking_lot_color
-            )
+    # Dibuja la flecha al final del arco
+    for start_point, end_point in narrow_arrow_segments[direction]:
+        cv2.line(img, start_point, end_point, (narrow_index,),
+                 narrow_thickness)
 
 
-def draw_obstacles_set(img, section: Section, obstacles_set: list[Obstacle]):
+def render_narrow_overlay(direction: Direction) -> tuple:
     """
-    Dibuja un conjunto de obstáculos definidos por los elementos de
-    `obstacles_set` en la sección recta definida por la función `section`.
+    Dibuja el arco estrecho para la dirección `direction` sobre un lienzo
+    vacío y devuelve solo el rectángulo que lo contiene: los límites de las
+    filas y de las columnas, los píxeles del arco y la máscara que indica
+    qué píxeles le pertenecen.
     """
 
-    for obstacle in obstacles_set:
-        obstacle.draw(img, section)
+    scratch = np.full(template.shape, white_index, np.uint8)
+    draw_narrow(scratch, direction)
 
+    mask = scratch == narrow_index
+    rows, cols = np.nonzero(mask)
+    row_from, row_to = int(rows.min()), int(rows.max()) + 1
+    col_from, col_to = int(cols.min()), int(cols.max()) + 1
 
-def draw_narrow(img, direction: Direction):
-    """
-    Dibuja el arco estrecho en la sección central del campo de juego.
-    `direction` contiene la dirección de conducción del vehículo.
-    """
+    return (
+        row_from, row_to, col_from, col_to,
+        scratch[row_from:row_to, col_from:col_to].copy(),
+        mask[row_from:row_to, col_from:col_to].astype(np.uint8)
+    )
 
-    # El centro del campo de juego se calcula teniendo en cuenta las paredes
-    # exteriores.
-    img_center = (width // 2 + border, height // 2 + border)
 
-    axes = (narrow_radius, narrow_radius)
-    startA = 180
-    endA = -90
-    # Dibuja el arco
-    img = cv2.ellipse(img, img_center, axes, 0, startA, endA,
-                      narrow_color, narrow_thickness)
+# El arco estrecho solo depende de la dirección de conducción, por eso se
+# dibuja una sola vez para cada dirección al cargar el módulo y en cada
+# petición se copia sobre el lienzo con su máscara.
+narrow_overlays = {
+    direction: render_narrow_overlay(direction) for direction in Direction
+}
 
-    # Dibuja la flecha al final del arco
-    if Direction.is_cw(direction):
-        startP = (img_center[0] - narrow_radius, img_center[1])
-        endP = (img_center[0] - narrow_radius - 30, img_center[1] + 80)
-        img = cv2.line(img, startP, endP, narrow_color, narrow_thickness)
-        endP = (img_center[0] - narrow_radius + 50, img_center[1] + 75)
-        img = cv2.line(img, startP, endP, narrow_color, narrow_thickness)
 
-    elif Direction.is_ccw(direction):
-        startP = (img_center[0], img_center[1] - narrow_radius)
-        endP = (img_center[0] + 80, img_center[1] - narrow_radius - 30)
-        img = cv2.line(img, startP, endP, narrow_color, narrow_thickness)
-        endP = (img_center[0] + 75, img_center[1] - narrow_radius + 50)
-        img = cv2.line(img, startP, endP, narrow_color, narrow_thickness)
+def draw_narrow_overlay(img: np.ndarray, direction: Direction):
+    """
+    Copia el arco estrecho precalculado para la dirección `direction` sobre
+    la imagen. El resultado es idéntico al de `draw_narrow`.
+    """
+
+    row_from, row_to, col_from, col_to, pixels, mask = \
+        narrow_overlays[direction]
+    cv2.copyTo(pixels, mask, img[row_from:row_to, col_from:col_to])
 
 
 def draw_scheme_for_final(scheme):
@@ -977,13 +1224,15 @@ def draw_scheme_for_final(scheme):
 
     - parking_section: la sección donde se encuentra el estacionamiento.
 
-    Devuelve un arreglo tridimensional de NumPy (matriz) que representa el
+    Las paredes interiores fijas ya forman parte de la plantilla usada.
+
+    Devuelve un arreglo bidimensional de NumPy (matriz) que representa el
     campo de juego
-    donde cada píxel está representado por tres números que corresponden al
-    color BGR.
+    donde cada píxel está representado por el índice de su color en
+    `palette`.
     """
 
-    image = template.copy()
+    image = acquire_canvas(obstacle_template)
 
     # Crea el objeto de posición de inicio del vehículo para la zona dada
     # y dibuja en la sección recta elegida
@@ -997,26 +1246,31 @@ def draw_scheme_for_final(scheme):
     for obstacles_set_index in obstacles_configuration:
         draw_obstacles_set(
             image, obstacles_configuration[obstacles_set_index],
-            obstacles_sets[obstacles_set_index]
+            obstacles_set_index
             )
 
     return image
 
 
-def draw_layout(direction: Direction, fixed: bool) -> np.ndarray:
-    """Genera el campo de juego y dibuja sobre él."""
+def randomize_layout(direction: Direction, fixed: bool,
+                     rng: random.Random = rng) -> tuple:
+    """
+    Aleatoriza el campo de juego para las rondas de desafío abierto sin
+    dibujarlo.
 
-    # No se puede usar list(Section) porque los elementos de Section son
-    # funciones.
-    sections = [Section.NORTH, Section.WEST, Section.SOUTH, Section.EAST]
+    Devuelve el esquema como una tupla `(direction, inner_walls_config,
+    start_section, start_zone)` que se dibuja con `draw_layout_scheme`.
+
+    `rng` es el generador de números aleatorios usado para la aleatorización.
+    """
 
     # Elige en qué lados de la alfombra de juego las paredes interiores
     # deben dibujarse más cerca de las paredes exteriores.
-    inner_walls_config = sample(sections, randint(0, 4))
+    inner_walls_config = rng.sample(straight_sections, rng.randint(0, 4))
     inner_walls = InnerWall(inner_walls_config)
 
     # Elige la sección recta donde se encuentra la zona de inicio.
-    starting_section = choice(sections)
+    starting_section = rng.choice(straight_sections)
 
     # Si la pared interior en la sección de inicio está más cerca de la pared
     # exterior, la zona de inicio podría ser solo una de las cuatro zonas
@@ -1029,187 +1283,317 @@ def draw_layout(direction: Direction, fixed: bool) -> np.ndarray:
     )
 
     # Elige la zona de inicio dentro de las zonas permitidas.
-    starting_zone = choice(allowed_zones)
+    starting_zone = rng.choice(allowed_zones)
+
+    # Las paredes se dibujan dependiendo de si el centro es fijo o aleatorio
+    if fixed:
+        inner_walls = InnerWall()  # Usar un centro fijo
 
-    image = template.copy()
+    return (direction, inner_walls.config_index(),
+            starting_section, starting_zone)
+
+
+def draw_layout_scheme(direction: Direction, inner_walls_config: int,
+                       start_section: int,
+                       start_zone: StartZone) -> np.ndarray:
+    """
+    Dibuja el campo de juego para las rondas de desafío abierto a partir del
+    esquema devuelto por `randomize_layout`.
+    """
+
+    image = acquire_canvas()
 
     # Crea el objeto de posición de inicio del vehículo para la zona dada
     # y dibuja en la sección recta elegida
-    VehiclePosition(starting_zone).draw(image, starting_section)
+    VehiclePosition(start_zone).draw(image, start_section)
 
-    # Dibuja las paredes dependiendo de si el centro es fijo o aleatorio
-    if fixed:
-        inner_walls = InnerWall()  # Usar un centro fijo
-        inner_walls.draw(image)
-    else:
-        inner_walls.draw(image)
+    # Dibuja las paredes interiores
+    draw_inner_walls(image, inner_walls_config)
 
     # Dibuja el arco estrecho en la sección central
-    draw_narrow(image, direction)
+    draw_narrow_overlay(image, direction)
 
     return image
 
 
-def randomize_and_draw_layout_for_open(direction: Direction) -> np.ndarray:
+def draw_layout(direction: Direction, fixed: bool,
+                rng: random.Random = rng) -> np.ndarray:
+    """
+    Genera el campo de juego y dibuja sobre él.
+
+    `rng` es el generador de números aleatorios usado para la aleatorización.
+    """
+
+    return draw_layout_scheme(*randomize_layout(direction, fixed, rng))
+
+
+def randomize_layout_for_open(direction: Direction,
+                              rng: random.Random = rng) -> tuple:
+    """
+    Aleatoriza el campo de juego para las rondas de desafío abierto y
+    devuelve su esquema.
+    """
+
+    return randomize_layout(direction, fixed=False, rng=rng)
+
+
+def randomize_layout_fixed(direction: Direction,
+                           rng: random.Random = rng) -> tuple:
+    """
+    Aleatoriza el campo de juego para las rondas de desafío abierto con el
+    centro fijo y devuelve su esquema.
+    """
+
+    return randomize_layout(direction, fixed=True, rng=rng)
+
+
+def randomize_and_draw_layout_for_open(direction: Direction,
+                                       rng: random.Random = rng
+                                       ) -> np.ndarray:
     """
     Genera el campo de juego para las rondas de desafío abierto.
 
-    Devuelve un arreglo tridimensional de NumPy (matriz) que representa el
-    campo de juego donde cada píxel está representado por tres números que
-    corresponden al color BGR.
+    Devuelve un arreglo bidimensional de NumPy (matriz) que representa el
+    campo de juego donde cada píxel está representado por el índice de su
+    color en `palette`.
     """
 
-    return draw_layout(direction, fixed=False)
+    return draw_layout(direction, fixed=False, rng=rng)
 
 
-def randomize_and_draw_layout_fixed(direction: Direction) -> np.ndarray:
+def randomize_and_draw_layout_fixed(direction: Direction,
+                                    rng: random.Random = rng) -> np.ndarray:
     """
     Genera el campo de juego para las rondas de desafío abierto con el centro
     fijo.
 
-    Devuelve un arreglo tridimensional de NumPy (matriz) que representa el
-    campo de juego donde cada píxel está representado por tres números que
-    corresponden al color BGR.
+    Devuelve un arreglo bidimensional de NumPy (matriz) que representa el
+    campo de juego donde cada píxel está representado por el índice de su
+    color en `palette`.
     """
 
-    return draw_layout(direction, fixed=True)
+    return draw_layout(direction, fixed=True, rng=rng)
 
 
-def randomize_and_draw_layout_for_obstacle(direction: Direction) -> np.ndarray:
+def obstacles_sets_at_intersections(intersections) -> np.ndarray:
     """
-    Genera el campo de juego para las rondas de desafío de obstáculos.
+    Devuelve un arreglo booleano que indica, para cada conjunto de
+    obstáculos, si alguno de sus obstáculos está en alguna de las
+    intersecciones dadas.
 
-    Devuelve un arreglo tridimensional de NumPy (matriz) que representa el
-    campo de juego donde cada píxel está representado por tres números que
-    corresponden al color BGR.
+    Compara de una vez las posiciones de todos los obstáculos de todos los
+    conjuntos con todas las intersecciones. Las posiciones de relleno (-1) de
+    `obstacles_positions` nunca coinciden con una intersección.
     """
 
-    # El conjunto de intersecciones que estarán frente al vehículo
-    # en la zona de inicio para la dirección de conducción dada.
-    forbidden_intersections = forbidden_intersections_in_start_zone[direction]
+    points = np.array(
+        [intersection.value for intersection in intersections],
+        dtype=np.int16
+        )
+    matches = (
+        obstacles_positions[:, :, np.newaxis, :] ==
+        points[np.newaxis, np.newaxis, :, :]
+        ).all(axis=3)
+    return matches.any(axis=(1, 2))
+
+
+# Número de obstáculos verdes y rojos de cada conjunto de obstáculos.
+obstacles_green_counts = np.array(
+    [sum(one_obstacle.is_green() for one_obstacle in one_set)
+     for one_set in obstacles_sets], dtype=np.int8
+    )
+obstacles_red_counts = np.array(
+    [sum(one_obstacle.is_red() for one_obstacle in one_set)
+     for one_set in obstacles_sets], dtype=np.int8
+    )
+
+if np.any(obstacles_green_counts + obstacles_red_counts != obstacles_counts):
+    raise ValueError("Unknown obstacle color")
+
+# Bit de cada zona de inicio posible en las rondas de desafío de obstáculos.
+# Las zonas de inicio prohibidas se guardan como máscaras de bits.
+start_zone_bits = {
+    StartZone.Z3: 1,
+    StartZone.Z4: 2
+}
+
+# Máscara con todas las zonas de inicio posibles prohibidas.
+all_start_zones_forbidden = sum(start_zone_bits.values())
+
+# Zonas de inicio prohibidas por cada conjunto de obstáculos para cada
+# dirección de conducción (como máscara de bits): las zonas en las que algún
+# obstáculo del conjunto estaría frente al vehículo.
+obstacles_sets_forbidden_start_zones = {}
+
+for direction, forbidden_intersections in \
+        forbidden_intersections_in_start_zone.items():
+    forbidden_zones_mask = np.zeros(len(obstacles_sets), dtype=np.uint8)
+    for zone, intersections in forbidden_intersections.items():
+        forbidden_zones_mask[
+            obstacles_sets_at_intersections(intersections)
+            ] |= start_zone_bits[zone]
+    obstacles_sets_forbidden_start_zones[direction] = forbidden_zones_mask
+
+# Indica si algún obstáculo del conjunto está en una intersección que no se
+# puede usar en la sección de estacionamiento.
+obstacles_sets_conflicting_with_parking_section = \
+    obstacles_sets_at_intersections(forbidden_intersections_in_parking_section)
 
-    # Busca los conjuntos de obstáculos que satisfacen las condiciones:
+
+def check_obstacles_sets(chosen_obstacles_sets_indices: tuple,
+                         direction: Direction):
+    """
+    Comprueba si la combinación de conjuntos de obstáculos dada es válida
+    para la dirección de conducción `direction`.
+
+    Si lo es, devuelve una tupla con las zonas de inicio prohibidas (como
+    máscara de bits de `start_zone_bits`) para cada conjunto de obstáculos
+    que tiene al menos una zona de inicio válida y con los conjuntos de
+    obstáculos adecuados para la sección de estacionamiento. En caso
+    contrario devuelve `None`.
+    """
+
+    # Calcula el número de obstáculos y el número de obstáculos verdes y
+    # rojos de los conjuntos de obstáculos elegidos.
+    indices = list(chosen_obstacles_sets_indices)
+    obstacles_amount = int(obstacles_counts[indices].sum())
+    green_amount = int(obstacles_green_counts[indices].sum())
+    red_amount = int(obstacles_red_counts[indices].sum())
+
+    # Obtén las zonas de inicio prohibidas de los conjuntos de obstáculos
+    # elegidos, manteniendo solo los conjuntos que tienen al menos una zona
+    # de inicio válida (se descartan aquellos donde ambas zonas de inicio
+    # posibles están prohibidas).
+    forbidden_zones_by_set = obstacles_sets_forbidden_start_zones[direction]
+    forbidden_start_zones = {
+        obstacles_set_index: int(forbidden_zones_by_set[obstacles_set_index])
+        for obstacles_set_index in chosen_obstacles_sets_indices
+        if forbidden_zones_by_set[obstacles_set_index] !=
+        all_start_zones_forbidden
+    }
+
+    # Obtén todos los conjuntos de obstáculos que son adecuados para la
+    # sección de estacionamiento.
+    obstacles_set_suitable_for_parking_section = {
+        obstacles_set_index
+        for obstacles_set_index in chosen_obstacles_sets_indices
+        if not obstacles_sets_conflicting_with_parking_section[
+            obstacles_set_index]
+    }
+
+    # La combinación es válida si se satisfacen las condiciones:
     #
     # - la diferencia entre el número de obstáculos verdes y rojos no es
     # mayor que uno
     #
     # - el número total de obstáculos es al menos 5
     #
-    # - hay al menos una zona de inicio válida para la combinación
-    # de obstáculos dada
-    satisfied = False
+    # - hay al menos una zona de inicio válida para la combinación de
+    # obstáculos dada
+    #
+    # - hay al menos un conjunto de obstáculos que es adecuado para la
+    # sección de estacionamiento
+    satisfied = (abs(green_amount - red_amount) <= 1) and \
+        (obstacles_amount > 4) and \
+        (len(forbidden_start_zones) > 0) and \
+        (len(obstacles_set_suitable_for_parking_section) > 0)
 
-    while not satisfied:
-        # Elige el índice del conjunto de obstáculos obligatorio.
-        mandatory_set_color = choice([Color.GREEN, Color.RED])
-        mandatory_obstacles_set = mandatory_obstacles_sets[mandatory_set_color]
+    if not satisfied:
+        return None
 
-        # Elige el índice del conjunto de obstáculos requerido.
-        required_obstacles_set = choice(required_obstacles_sets)
+    return forbidden_start_zones, obstacles_set_suitable_for_parking_section
 
-        # Elige el índice del conjunto de obstáculos para una de las dos
-        # secciones restantes.
-        os1 = mandatory_obstacles_set
 
-        while os1 == required_obstacles_set or os1 == mandatory_obstacles_set:
-            os1 = randint(0, len(obstacles_sets) - 1)
+def valid_obstacles_sets_combinations(direction: Direction) -> list:
+    """
+    Enumera todas las combinaciones válidas de conjuntos de obstáculos para
+    la dirección de conducción `direction`.
+
+    Cada combinación es una tupla `(chosen_obstacles_sets_indices,
+    forbidden_start_zones, obstacles_set_suitable_for_parking_section)`.
+    Los índices de los conjuntos de obstáculos están ordenados: el conjunto
+    obligatorio, el conjunto requerido y los conjuntos de las dos secciones
+    restantes.
+    """
 
-        # Elige el índice del conjunto de obstáculos para la última sección
-        # restante.
-        os2 = mandatory_obstacles_set
+    combinations = []
+
+    for mandatory_obstacles_set in mandatory_obstacles_sets.values():
+        for required_obstacles_set in required_obstacles_sets:
+            # Conjuntos de obstáculos disponibles para las dos secciones
+            # restantes.
+            remaining = [
+                obstacles_set_index
+                for obstacles_set_index in range(len(obstacles_sets))
+                if obstacles_set_index != mandatory_obstacles_set and
+                obstacles_set_index != required_obstacles_set
+            ]
 
-        while os2 == required_obstacles_set or  \
-            os2 == mandatory_obstacles_set or \
-                os2 == os1:
-            os2 = randint(0, len(obstacles_sets) - 1)
+            for os1, os2 in itertools.permutations(remaining, 2):
+                chosen_obstacles_sets_indices = (
+                    mandatory_obstacles_set,
+                    required_obstacles_set,
+                    os1,
+                    os2
+                    )
+                checked = check_obstacles_sets(
+                    chosen_obstacles_sets_indices, direction
+                    )
+                if checked is not None:
+                    combinations.append(
+                        (chosen_obstacles_sets_indices,) + checked
+                        )
+
+    return combinations
+
+
+# Combinaciones válidas de conjuntos de obstáculos para cada dirección de
+# conducción, calculadas una sola vez al cargar el módulo.
+#
+# Los conjuntos obligatorios y los requeridos no se repiten entre sí, por eso
+# cada combinación ordenada es igual de probable. Elegir una combinación
+# válida de esta lista de manera uniforme da la misma distribución que
+# repetir la elección aleatoria hasta encontrar una combinación válida.
+obstacles_sets_combinations = {
+    direction: valid_obstacles_sets_combinations(direction)
+    for direction in Direction
+}
 
-        chosen_obstacles_sets_indices = [
-            mandatory_obstacles_set,
-            required_obstacles_set,
-            os1,
-            os2
-            ]
 
-        # Calcula el número de obstáculos, el número de obstáculos verdes y
-        # rojos y las zonas de inicio prohibidas para los conjuntos de
-        # obstáculos elegidos.
-        forbidden_start_zones = {}
-        obstacles_set_conflicting_with_parking_section = set()
-        obstacles_amount = 0
-        green_amount = 0
-        red_amount = 0
-
-        for obstacles_set_index in chosen_obstacles_sets_indices:
-            one_obstacles_set = obstacles_sets[obstacles_set_index]
-
-            obstacles_amount = obstacles_amount + len(one_obstacles_set)
-
-            forbidden_start_zones[obstacles_set_index] = set()
-
-            for one_obstacle in one_obstacles_set:
-                if one_obstacle.is_green():
-                    green_amount = green_amount + 1
-
-                elif one_obstacle.is_red():
-                    red_amount = red_amount + 1
-
-                else:
-                    raise ValueError("Unknown obstacle color")
-
-                # Comprueba si el obstáculo actual estaría frente al
-                # vehículo para cada posible zona de inicio en esta sección
-                for zone in forbidden_intersections:
-                    if one_obstacle.position in forbidden_intersections[zone]:
-                        forbidden_start_zones[obstacles_set_index].add(zone)
-
-                # Comprueba si la posición del obstáculo actual es adecuada
-                # para la sección donde se encuentra el estacionamiento.
-                for intersection in forbidden_intersections_in_parking_section:
-                    if one_obstacle.position == intersection:
-                        obstacles_set_conflicting_with_parking_section.add(
-                            obstacles_set_index
-                            )
-
-        # Elimina los conjuntos de obstáculos donde ambas zonas de inicio
-        # posibles están prohibidas,
-        # manteniendo solo los conjuntos que tienen al menos una zona de
-        # inicio válida.
-        for obstacles_set_index in forbidden_start_zones:
-            if len(forbidden_start_zones[obstacles_set_index]) == 2:
-                del forbidden_start_zones[obstacles_set_index]
-
-        # Obtén todos los conjuntos de obstáculos que son adecuados para la
-        # sección de estacionamiento.
-        obstacles_set_suitable_for_parking_section = set(
-            chosen_obstacles_sets_indices
-            ) - \
-            obstacles_set_conflicting_with_parking_section
-
-        # Detiene la búsqueda de los conjuntos de obstáculos si se satisfacen
-        # las condiciones:
-        #
-        # - la diferencia entre el número de obstáculos verdes y rojos no es
-        # mayor que uno
-        #
-        # - el número total de obstáculos es al menos 5
-        #
-        # - hay al menos una zona de inicio válida para la combinación de
-        # obstáculos dada
-        #
-        # - hay al menos un conjunto de obstáculos que es adecuado para la
-        # sección de estacionamiento
-        satisfied = (abs(green_amount - red_amount) <= 1) and \
-            (obstacles_amount > 4) and \
-            (len(forbidden_start_zones) > 0) and \
-            (len(obstacles_set_suitable_for_parking_section) > 0)
-
-    # No se puede usar list(Section) porque los elementos de Section son
-    # funciones.
-    sections = [Section.NORTH, Section.WEST, Section.SOUTH, Section.EAST]
+def randomize_layout_for_obstacle(direction: Direction,
+                                  rng: random.Random = rng) -> tuple:
+    """
+    Aleatoriza el campo de juego para las rondas de desafío de obstáculos sin
+    dibujarlo.
+
+    Devuelve el esquema como una tupla `(direction, start_section,
+    start_zone, obstacles, parking_section)` que se dibuja con
+    `draw_layout_scheme_for_obstacle`. `obstacles` es una tupla ordenada de
+    pares `(índice del conjunto de obstáculos, sección)`.
+    """
+
+    # Elige una de las combinaciones de conjuntos de obstáculos que
+    # satisfacen las condiciones:
+    #
+    # - la diferencia entre el número de obstáculos verdes y rojos no es
+    # mayor que uno
+    #
+    # - el número total de obstáculos es al menos 5
+    #
+    # - hay al menos una zona de inicio válida para la combinación
+    # de obstáculos dada
+    #
+    # - hay al menos un conjunto de obstáculos que es adecuado para la
+    # sección de estacionamiento
+    (chosen_obstacles_sets_indices,
+     forbidden_start_zones,
+     obstacles_set_suitable_for_parking_section) = rng.choice(
+        obstacles_sets_combinations[direction]
+        )
 
     # Asigna aleatoriamente cada conjunto de obstáculos a una sección única
     # del campo de juego
-    shuffled_sections = sample(sections, 4)
+    shuffled_sections = rng.sample(straight_sections, 4)
     sections_for_obstacles_sets = {}
     for obstacles_set_index in chosen_obstacles_sets_indices:
         sections_for_obstacles_sets[obstacles_set_index] =  \
@@ -1217,14 +1601,16 @@ def randomize_and_draw_layout_for_obstacle(direction: Direction) -> np.ndarray:
 
     # Elige uno de los conjuntos de obstáculos que tiene al menos una zona de
     # inicio válida.
-    obstacles_set_in_start_section = choice(list(forbidden_start_zones.keys()))
+    obstacles_set_in_start_section = rng.choice(
+        list(forbidden_start_zones.keys())
+        )
 
     # Elige la sección donde se encuentra el conjunto de obstáculos elegido.
     start_section = sections_for_obstacles_sets[obstacles_set_in_start_section]
 
     # Elige uno de los conjuntos de obstáculos que es adecuado para la sección
     # de estacionamiento.
-    obstacles_set_in_parking_section = choice(
+    obstacles_set_in_parking_section = rng.choice(
         list(obstacles_set_suitable_for_parking_section)
         )
 
@@ -1235,41 +1621,197 @@ def randomize_and_draw_layout_for_obstacle(direction: Direction) -> np.ndarray:
 
     # Elige una de las zonas de inicio válidas para el conjunto de obstáculos
     # elegido.
-    start_zone = choice(
-        list(set([StartZone.Z3, StartZone.Z4]) -
-             forbidden_start_zones[obstacles_set_in_start_section]
-             ))
+    forbidden_zones_mask = \
+        forbidden_start_zones[obstacles_set_in_start_section]
+    start_zone = rng.choice([
+        zone for zone, bit in start_zone_bits.items()
+        if not forbidden_zones_mask & bit
+    ])
+
+    return (direction, start_section, start_zone,
+            tuple(sorted(sections_for_obstacles_sets.items())),
+            parking_section)
+
+
+def draw_layout_scheme_for_obstacle(direction: Direction, start_section: int,
+                                    start_zone: StartZone, obstacles: tuple,
+                                    parking_section: int) -> np.ndarray:
+    """
+    Dibuja el campo de juego para las rondas de desafío de obstáculos a
+    partir del esquema devuelto por `randomize_layout_for_obstacle`.
+    """
 
     scheme = {
         'start_section': start_section,
         'start_zone': start_zone,
-        'obstacles': sections_for_obstacles_sets,
+        'obstacles': dict(obstacles),
         'parking_section': parking_section
     }
     image = draw_scheme_for_final(scheme)
 
-    # Dibuja las paredes interiores
-    InnerWall().draw(image)
-
     # Dibuja el arco estrecho en la sección central
-    draw_narrow(image, direction)
+    draw_narrow_overlay(image, direction)
 
     return image
 
 
+def randomize_and_draw_layout_for_obstacle(direction: Direction,
+                                           rng: random.Random = rng
+                                           ) -> np.ndarray:
+    """
+    Genera el campo de juego para las rondas de desafío de obstáculos.
+
+    Devuelve un arreglo bidimensional de NumPy (matriz) que representa el
+    campo de juego donde cada píxel está representado por el índice de su
+    color en `palette`.
+    """
+
+    return draw_layout_scheme_for_obstacle(
+        *randomize_layout_for_obstacle(direction, rng)
+        )
+
+
 # HTTP Content related
 
+# Las imágenes PNG se escriben directamente con paleta (un byte por píxel).
+# OpenCV solo escribe PNG en escala de grises o en color (tres bytes por
+# píxel), que tarda unas tres veces más en comprimirse y ocupa más del doble.
+png_signature = b'\x89PNG\r\n\x1a\n'
+
+# Paleta en el formato del fragmento PLTE de PNG: RGB.
+png_palette = bytes(
+    channel for blue, green, red in palette for channel in (red, green, blue)
+    )
+
+
+def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """
+    Devuelve un fragmento PNG del tipo `chunk_type` con los datos dados,
+    precedido de su longitud y seguido de su CRC.
+    """
+
+    return (struct.pack('>I', len(data)) + chunk_type + data +
+            struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+
+def encode_png(img: np.ndarray) -> bytes:
+    """
+    Codifica la imagen con índices de la paleta como PNG con paleta y
+    devuelve los bytes resultantes.
+
+    La estrategia RLE con el nivel de compresión más rápido es la opción más
+    rápida para imágenes con grandes áreas de un solo color como el campo de
+    juego. zlib libera el GIL mientras comprime.
+
+    La imagen debe provenir de `acquire_canvas()`: el lienzo completo ya
+    incluye el tipo de filtro de PNG antes de cada fila.
+    """
+
+    img_height, img_width = img.shape
+    rows = canvas_rows(img)
+
+    compressor = zlib.compressobj(zlib.Z_BEST_SPEED, zlib.DEFLATED,
+                                  zlib.MAX_WBITS, 9, zlib.Z_RLE)
+    compressed = compressor.compress(rows.data) + compressor.flush()
+
+    # Profundidad de 8 bits, tipo de color 3 (con paleta), compresión,
+    # filtro y entrelazado por defecto.
+    header = struct.pack('>IIBBBBB', img_width, img_height, 8, 3, 0, 0, 0)
+
+    return (png_signature +
+            png_chunk(b'IHDR', header) +
+            png_chunk(b'PLTE', png_palette) +
+            png_chunk(b'IDAT', compressed) +
+            png_chunk(b'IEND', b''))
+
+
+def encode_image(img: np.ndarray) -> bytes:
+    """
+    Codifica la imagen con índices de la paleta al formato PNG y devuelve los
+    bytes resultantes.
+
+    La imagen debe provenir de `acquire_canvas()`: una vez codificada, el
+    lienzo se devuelve a la reserva para la siguiente petición.
+    """
+
+    encoded = encode_png(img)
+    release_canvas(img)
+    return encoded
+
+
+# Tiempo (en segundos) durante el cual los navegadores y las cachés HTTP
+# pueden guardar una imagen generada a partir de una semilla.
+seeded_image_max_age = 24 * 60 * 60
+
+
+def image_response(image, max_age: int = 0):
+    """
+    Devuelve la imagen PNG ya codificada como respuesta HTTP.
+
+    Si `max_age` es mayor que cero, la respuesta se puede guardar en caché
+    durante `max_age` segundos y lleva un ETag para que las peticiones
+    condicionales repetidas reciban `304 Not Modified`.
+    """
+
+    cache_control = f'public, max-age={max_age}' if max_age > 0 \
+        else 'no-store'
+
+    response = Response(image, mimetype='image/png',
+                        headers={'Cache-Control': cache_control})
+
+    if max_age > 0:
+        response.add_etag()
+        response.make_conditional(request)
+
+    return response
+
 
 def generate_image(img):
     """
-    Codifica la imagen desde una matriz tridimensional de NumPy al formato PNG
-    y la devuelve como respuesta HTTP.
+    Codifica la imagen con índices de la paleta al formato PNG y la devuelve
+    como respuesta HTTP.
+    """
+
+    return image_response(encode_image(img))
+
+
+@lru_cache(maxsize=512)
+def render_scheme(drawer, scheme: tuple) -> bytes:
+    """
+    Dibuja el esquema `scheme` con la función `drawer` y devuelve la imagen
+    codificada en PNG.
+
+    El número de esquemas distintos es finito y la imagen solo depende del
+    esquema, por eso el resultado se memoriza: los esquemas repetidos no
+    vuelven a dibujarse ni a codificarse.
+    """
+
+    return encode_image(drawer(*scheme))
+
+
+def generate_seeded_image(randomizer, drawer, seed: int):
+    """
+    Aleatoriza el campo de juego con la función `randomizer` usando un
+    generador de números aleatorios inicializado con `seed`, lo dibuja con la
+    función `drawer` y lo devuelve como respuesta HTTP.
+
+    La misma semilla siempre produce el mismo campo de juego, por eso la
+    respuesta se puede guardar en caché.
+    """
+
+    seeded_rng = random.Random(seed)
+    direction = random_direction(seeded_rng)
+    scheme = randomizer(direction, seeded_rng)
+    return image_response(render_scheme(drawer, scheme), seeded_image_max_age)
+
+
+def redirect_to_random_seed(endpoint: str):
+    """
+    Elige una semilla aleatoria y redirige al punto final `endpoint` con
+    esa semilla.
     """
 
-    res, im_png = cv2.imencode('.png', img)
-    image = im_png.tobytes()
-    response = make_response(image)
-    response.headers.set('Content-Type', 'image/png')
+    response = redirect(url_for(endpoint, seed=secrets.randbits(32)))
     response.headers.set('Cache-Control', 'no-store')
     return response
 
@@ -1282,16 +1824,19 @@ def index():
     return render_template('index.html')
 
 
-def random_direction():
-    return random.choice([Direction.CW, Direction.CCW])
+def random_direction(rng: random.Random = rng):
+    return rng.choice([Direction.CW, Direction.CCW])
 
 
 @app.route('/qualification/random')
 def generate_qualification_random():
-    direction = random_direction()
-    layout = randomize_and_draw_layout_for_open(direction)
-    response = generate_image(layout)
-    return response
+    return redirect_to_random_seed('generate_qualification_seeded')
+
+
+@app.route('/qualification/<int:seed>')
+def generate_qualification_seeded(seed: int):
+    return generate_seeded_image(randomize_layout_for_open,
+                                 draw_layout_scheme, seed)
 
 
 """
@@ -1312,10 +1857,13 @@ def generate_qualification_random():
 
 @app.route('/qualification-fixed/random')
 def generate_fixed_qualification_random():
-    direction = random_direction()
-    layout = randomize_and_draw_layout_fixed(direction)
-    response = generate_image(layout)
-    return response
+    return redirect_to_random_seed('generate_fixed_qualification_seeded')
+
+
+@app.route('/qualification-fixed/<int:seed>')
+def generate_fixed_qualification_seeded(seed: int):
+    return generate_seeded_image(randomize_layout_fixed,
+                                 draw_layout_scheme, seed)
 
 
 """
@@ -1336,10 +1884,13 @@ def generate_fixed_qualification_random():
 
 @app.route('/final/random')
 def generate_final_random():
-    direction = random_direction()
-    layout = randomize_and_draw_layout_for_obstacle(direction)
-    response = generate_image(layout)
-    return response
+    return redirect_to_random_seed('generate_final_seeded')
+
+
+@app.route('/final/<int:seed>')
+def generate_final_seeded(seed: int):
+    return generate_seeded_image(randomize_layout_for_obstacle,
+                                 draw_layout_scheme_for_obstacle, seed)
 
 
 """
@@ -0,0 +1,30 @@
+"""
+Configuración de gunicorn para la aplicación de aleatorización WRO Future
+Engineers.
+
+gunicorn lee este archivo automáticamente cuando se ejecuta desde este
+directorio, por ejemplo con `gunicorn aplicacion:app`.
+"""
+
+import os
+
+# Dibujar y codificar el campo de juego usa la CPU intensivamente, por eso se
+# inicia un proceso por cada núcleo disponible para atender varias peticiones
+# en paralelo. La variable de entorno `WEB_CONCURRENCY` permite cambiar el
+# número de procesos.
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+
+# Cada proceso atiende además varias peticiones con hilos: OpenCV y zlib
+# liberan el GIL mientras dibujan y comprimen las imágenes, así que la
+# codificación de una petición no bloquea a las demás. Las vistas asíncronas
+# de Flask no añadirían concurrencia: bajo WSGI cada una se sigue ejecutando
+# en uno de estos hilos hasta que termina.
+# El número de hilos se guarda en la variable de entorno `GUNICORN_THREADS`,
+# que también lee `aplicacion.py` para reservar un lienzo por hilo, y se
+# puede cambiar desde ella.
+threads = int(os.environ.setdefault('GUNICORN_THREADS', '4'))
+
+# La aplicación se carga una sola vez antes de crear los procesos, así las
+# tablas y la plantilla calculadas al importar el módulo se comparten entre
+# ellos en lugar de calcularse en cada proceso.
+preload_app = True